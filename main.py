@@ -1,16 +1,362 @@
 import customtkinter as ctk
 import sqlite3
-from datetime import datetime
+import os
+import sys
+import time
+import argparse
+import re
+import html
+import heapq
+import webbrowser
+import threading
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from datetime import datetime, timedelta
 from tkinter import messagebox, Toplevel
 
+BACKUP_DIR = "backup"
+BACKUP_SIMPAN = 7
+BACKUP_PAGES_PER_STEP = 64
+VACUUM_PAGES_PER_STEP = 256
+MAINTENANCE_INTERVAL_JAM = 24
+MAINTENANCE_CHECK_MS = 10 * 60 * 1000
+BATAS_PINJAM = 3
+LAMA_PINJAM_HARI = 7
+RIWAYAT_PAGE_SIZE = 20
+# Tabel yang ditampilkan tiap tab; tulis ke salah satunya menandai tab itu kotor
+TAB_TABLES = {"buku": {"buku"}, "anggota": {"anggota"}, "history": {"peminjaman", "buku", "anggota"}}
+FUZZY_AMBANG = 0.5
+FUZZY_LIMIT = 200
+# Ejaan lama (van Ophuijsen/Soewandi) dan variasi umum disamakan dulu sebelum dipecah jadi trigram
+EJAAN_LAMA = [("oe", "u"), ("dj", "j"), ("tj", "c"), ("nj", "ny"), ("sj", "sy"), ("ch", "h"), ("kh", "h"),
+              ("ph", "f"), ("th", "t"), ("dh", "d"), ("dz", "z"), ("q", "k"), ("v", "f")]
+
+
+LAPORAN_DIR = "laporan"
+LAPORAN_BARIS_PER_HALAMAN = 40
+LAPORAN_FETCH = 1000
+JENIS_LAPORAN = {
+    "kategori": "Peminjaman per Kategori",
+    "terlambat": "Daftar Keterlambatan",
+    "inventaris": "Inventaris per Status",
+    "transaksi": "Log Transaksi",
+}
+
+RE_KATA = re.compile(r"[a-z0-9]+")
+RE_HURUF_ULANG = re.compile(r"(.)\1+")
+
+
+@lru_cache(maxsize=65536)
+def _normalisasi_kata(w):
+    for lama, baru in EJAAN_LAMA: w = w.replace(lama, baru)
+    if w.startswith("moh"): w = "muh" + w[3:]
+    return RE_HURUF_ULANG.sub(r"\1", w)
+
+
+@lru_cache(maxsize=65536)
+def _trigram_kata(w):
+    w = f"  {w} "
+    return frozenset(w[i:i + 3] for i in range(len(w) - 2))
+
+
+def normalisasi_nama(teks):
+    teks = str(teks)
+    if not teks.isascii(): teks = unicodedata.normalize("NFKD", teks).encode("ascii", "ignore").decode()
+    return " ".join(_normalisasi_kata(w) for w in RE_KATA.findall(teks.lower()))
+
+
+def trigram(teks):
+    grams = set()
+    for w in normalisasi_nama(teks).split(): grams |= _trigram_kata(w)
+    return grams
+
+
+class FuzzyIndex:
+    """Index trigram di memori untuk pencarian nama yang toleran ejaan (Muhammad/Mohamad, Dj/J, Oe/U)."""
+    def __init__(self):
+        self.postings = {}
+        self.grams = {}
+        self.sizes = {}
+        self.nama = {}
+
+    def add(self, id, teks):
+        if id in self.grams: self.remove(id)
+        nama = normalisasi_nama(teks)
+        grams = set()
+        for w in nama.split(): grams |= _trigram_kata(w)
+        self.nama[id] = nama
+        self.grams[id] = grams
+        self.sizes[id] = len(grams)
+        postings = self.postings
+        for g in grams:
+            if g in postings: postings[g].append(id)
+            else: postings[g] = [id]
+
+    def remove(self, id):
+        self.sizes.pop(id, None)
+        self.nama.pop(id, None)
+        for g in self.grams.pop(id, ()):
+            ids = self.postings[g]
+            ids.remove(id)
+            if not ids: del self.postings[g]
+
+    def search(self, term, limit=FUZZY_LIMIT, ambang=FUZZY_AMBANG):
+        if len(normalisasi_nama(term).replace(" ", "")) < 3: return {}
+        q = trigram(term)
+        hits = Counter()
+        for g in q:
+            ids = self.postings.get(g)
+            if ids: hits.update(ids)
+
+        # Skor = porsi trigram kata kunci yang ditemukan (agar nama depan saja tetap cocok),
+        # dikurangi sedikit oleh panjang nama supaya yang paling mirip ada di atas
+        n = len(q)
+        minimal = ambang * n
+        sizes = self.sizes
+        hasil = [(c / n * 0.8 + 0.4 * c / (n + sizes[id]), id) for id, c in hits.items() if c >= minimal]
+        if len(hasil) > limit: hasil = heapq.nlargest(limit, hasil)
+        return {id: skor for skor, id in hasil}
+
+    def substring(self, term):
+        # Pengganti LIKE '%term%': kandidat = irisan posting trigram di dalam tiap kata kata kunci (mulai dari
+        # yang terpendek), lalu dicek langsung ke nama ternormalisasi. None kalau kata kunci tak punya trigram.
+        t = normalisasi_nama(term)
+        grams = {w[i:i + 3] for w in t.split() for i in range(len(w) - 2)}
+        if not grams: return None
+        lists = sorted((self.postings.get(g, ()) for g in grams), key=len)
+        kandidat = set(lists[0])
+        for ids in lists[1:]:
+            if not kandidat: break
+            kandidat.intersection_update(ids)
+        nama = self.nama
+        return {id for id in kandidat if t in nama[id]}
+
+
+class ReportWriter:
+    """Penulis laporan bertahap: baris dikumpulkan per halaman lalu langsung ditulis ke file.
+
+    Subclass cukup mengisi _write_page; memori yang dipakai tidak bergantung pada jumlah baris.
+    """
+    def __init__(self, f, judul, keterangan):
+        self.f = f
+        self.judul = judul
+        self.keterangan = keterangan
+        self.bagian = None
+        self.kolom = []
+        self.lebar = []
+        self.baris = []
+        self.halaman = 0
+        self.halaman_bagian = 0
+
+    def section(self, judul, kolom, lebar):
+        self.flush()
+        self.bagian, self.kolom, self.lebar = judul, kolom, lebar
+        self.halaman_bagian = 0
+
+    def row(self, values):
+        self.baris.append(["-" if v is None else str(v) for v in values])
+        if len(self.baris) >= self.kapasitas(self.halaman + 1): self.flush()
+
+    def kapasitas(self, halaman):
+        return LAPORAN_BARIS_PER_HALAMAN
+
+    def flush(self):
+        if self.bagian is None: return
+        # Bagian tanpa baris sama sekali tetap dapat satu halaman berisi header
+        if self.baris or self.halaman_bagian == 0:
+            self.halaman += 1
+            self.halaman_bagian += 1
+            self._write_page(self.baris)
+        self.baris = []
+
+    def close(self):
+        self.flush()
+
+
+class HTMLReportWriter(ReportWriter):
+    def __init__(self, f, judul, keterangan):
+        super().__init__(f, judul, keterangan)
+        f.write(f"""<!DOCTYPE html>
+<html lang="id"><head><meta charset="utf-8"><title>{html.escape(judul)}</title>
+<style>
+body {{ font-family: sans-serif; font-size: 12px; margin: 20px; }}
+table {{ border-collapse: collapse; width: 100%; margin-bottom: 10px; }}
+th {{ background: #333; color: #fff; }} th, td {{ border: 1px solid #999; padding: 3px 6px; text-align: left; }}
+tr:nth-child(even) td {{ background: #eee; }}
+.halaman {{ page-break-after: always; }} .ket {{ color: #555; }}
+</style></head><body>
+<h1>{html.escape(judul)}</h1><p class="ket">{html.escape(keterangan)}</p>
+""")
+
+    def _write_page(self, baris):
+        esc = html.escape
+        out = [f'<div class="halaman"><h2>{esc(self.bagian)}</h2><table><thead><tr>']
+        out += [f"<th>{esc(k)}</th>" for k in self.kolom]
+        out.append("</tr></thead><tbody>\n")
+        out += ["<tr>" + "".join(f"<td>{esc(v)}</td>" for v in r) + "</tr>\n" for r in baris]
+        out.append(f'</tbody></table><p class="ket">Halaman {self.halaman}</p></div>\n')
+        self.f.write("".join(out))
+
+    def close(self):
+        super().close()
+        self.f.write("</body></html>\n")
+
+
+class PDFReportWriter(ReportWriter):
+    """PDF minimal (A4 landscape, Helvetica) tanpa dependensi tambahan; tiap halaman langsung ditulis."""
+    LEBAR, TINGGI, MARGIN, UKURAN, BARIS = 842, 595, 36, 9, 12
+
+    def __init__(self, f, judul, keterangan):
+        super().__init__(f, judul, keterangan)
+        self.offsets = {}
+        self.kids = []
+        self.next_obj = 5
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._obj(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    def _obj(self, num, body):
+        self.offsets[num] = self.f.tell()
+        self.f.write(f"{num} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def _new_obj(self):
+        self.next_obj += 1
+        return self.next_obj - 1
+
+    def _text(self, x, y, teks, font="F1", size=None):
+        teks = teks.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        return f"BT /{font} {size or self.UKURAN} Tf {x:.1f} {y:.1f} Td ({teks}) Tj ET\n"
+
+    def _y_header(self, halaman):
+        # Halaman pertama dipotong blok judul (34pt); judul bagian selalu 30pt
+        return self.TINGGI - self.MARGIN - (34 if halaman == 1 else 0) - 30
+
+    def kapasitas(self, halaman):
+        # Baris terakhir tidak boleh turun di bawah margin bawah (tempat footer "Halaman n")
+        return int((self._y_header(halaman) - self.MARGIN) // self.BARIS)
+
+    def _write_page(self, baris):
+        ops = []
+        y = self.TINGGI - self.MARGIN
+        if self.halaman == 1:
+            ops.append(self._text(self.MARGIN, y - 4, self.judul, "F2", 16))
+            ops.append(self._text(self.MARGIN, y - 20, self.keterangan))
+            y -= 34
+        ops.append(self._text(self.MARGIN, y - 12, self.bagian, "F2", 12))
+        y = self._y_header(self.halaman)
+
+        # Lebar kolom relatif dibagi ke lebar halaman, teks dipotong kira-kira 0.5em per karakter
+        tersedia = self.LEBAR - 2 * self.MARGIN
+        total = sum(self.lebar)
+        xs, maks, x = [], [], self.MARGIN
+        for w in self.lebar:
+            xs.append(x)
+            lebar_pt = tersedia * w / total
+            maks.append(max(3, int(lebar_pt / (self.UKURAN * 0.5)) - 1))
+            x += lebar_pt
+
+        ops.append(f"0.2 g {self.MARGIN} {y - 3:.1f} {tersedia} 13 re f 1 g\n")
+        for i, k in enumerate(self.kolom): ops.append(self._text(xs[i] + 2, y, k[:maks[i]], "F2"))
+        ops.append("0 g\n")
+        for r in baris:
+            y -= self.BARIS
+            for i, v in enumerate(r): ops.append(self._text(xs[i] + 2, y, v if len(v) <= maks[i] else v[:maks[i] - 2] + "..", "F1"))
+        ops.append(self._text(self.LEBAR - self.MARGIN - 60, self.MARGIN - 12, f"Halaman {self.halaman}"))
+
+        stream = "".join(ops).encode("cp1252", "replace")
+        content = self._new_obj()
+        self._obj(content, f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+        page = self._new_obj()
+        self._obj(page, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.LEBAR} {self.TINGGI}] "
+                        f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content} 0 R >>".encode())
+        self.kids.append(page)
+
+    def close(self):
+        super().close()
+        kids = " ".join(f"{k} 0 R" for k in self.kids)
+        self._obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.kids)} >>".encode())
+        self._obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.f.tell()
+        out = [f"xref\n0 {self.next_obj}\n0000000000 65535 f \n"]
+        out += [f"{self.offsets[i]:010d} 00000 n \n" for i in range(1, self.next_obj)]
+        out.append(f"trailer\n<< /Size {self.next_obj} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n")
+        self.f.write("".join(out).encode())
+
+
 class DatabaseManager:
     def __init__(self, db_name="perpustakaan_final.db"):
+        self.db_name = db_name
         self.conn = sqlite3.connect(db_name)
         self.cursor = self.conn.cursor()
+        self.listeners = []
+        self.fuzzy = {}
+        self.fuzzy_lock = threading.Lock()
+        self.fuzzy_pending = {}
         self._create_tables()
         self._migrate_tables()
 
+    def _changed(self, *tables):
+        for fn in self.listeners: fn(set(tables))
+
+    def _fuzzy_rows(self, name, conn):
+        query = {"anggota": "SELECT id, nama_lengkap FROM anggota", "penulis": "SELECT id, penulis FROM buku"}[name]
+        return conn.execute(query).fetchall()
+
+    def _install_fuzzy(self, name, rows):
+        # Index dibangun tanpa lock; lock hanya dipegang sebentar untuk memasang index dan
+        # memutar ulang perubahan yang masuk antrean selama pembangunan
+        index = FuzzyIndex()
+        for id, teks in rows: index.add(id, teks)
+        with self.fuzzy_lock:
+            for id, teks in self.fuzzy_pending.pop(name, []):
+                if teks is None: index.remove(id)
+                else: index.add(id, teks)
+            self.fuzzy[name] = index
+        return index
+
+    def warm_fuzzy_index(self):
+        # Bangun index di thread terpisah saat aplikasi dibuka; koneksi baca ditutup segera setelah fetchall
+        with self.fuzzy_lock:
+            names = [n for n in ("anggota", "penulis") if n not in self.fuzzy and n not in self.fuzzy_pending]
+            for n in names: self.fuzzy_pending[n] = []
+
+        def worker():
+            conn = sqlite3.connect(self.db_name, timeout=30)
+            try: data = {n: self._fuzzy_rows(n, conn) for n in names}
+            finally: conn.close()
+            for n in names: self._install_fuzzy(n, data[n])
+        if names: threading.Thread(target=worker, daemon=True).start()
+
+    def _fuzzy_index(self, name):
+        # Dibangun saat pencarian pertama (kalau belum di-warm), lalu dijaga tetap sinkron oleh method tulis
+        with self.fuzzy_lock:
+            if name in self.fuzzy: return self.fuzzy[name]
+            # Masih dibangun di belakang: sementara pencarian cukup memakai LIKE
+            if name in self.fuzzy_pending: return FuzzyIndex()
+            self.fuzzy_pending[name] = []
+        return self._install_fuzzy(name, self._fuzzy_rows(name, self.conn))
+
+    def _fuzzy_update(self, name, id, teks=None):
+        with self.fuzzy_lock:
+            if name in self.fuzzy_pending: self.fuzzy_pending[name].append((id, teks))
+            elif name in self.fuzzy:
+                if teks is None: self.fuzzy[name].remove(id)
+                else: self.fuzzy[name].add(id, teks)
+
+    def _rank(self, rows, term, skor, cols, per_skor=True):
+        # Cocok persis (substring) selalu di atas, sisanya menurut skor kemiripan; urutan SQL dipakai sebagai pemecah seri.
+        # per_skor=False: hanya dua tingkat (persis, lalu fuzzy) dan urutan SQL pilihan pengguna dipertahankan di dalamnya
+        t = term.lower()
+        def key(r):
+            persis = any(t in str(r[c]).lower() for c in cols)
+            if not per_skor: return not persis
+            return -(1.0 + skor.get(r[0], 0) if persis else skor.get(r[0], 0))
+        return sorted(rows, key=key)
+
     def _create_tables(self):
+        # Untuk database baru langsung berlaku; database lama dikonversi oleh jalankan_pemeliharaan
+        self.cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS anggota (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -43,6 +389,19 @@ class DatabaseManager:
                 FOREIGN KEY (anggota_id) REFERENCES anggota (id)
             )
         """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_peminjaman_anggota ON peminjaman (anggota_id, tanggal_pinjam)")
+        # Index parsial: hanya pinjaman aktif, jadi hitung batas pinjam tidak ikut menelusuri seluruh riwayat
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_peminjaman_aktif ON peminjaman (anggota_id) WHERE tanggal_kembali IS NULL")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_peminjaman_tanggal ON peminjaman (tanggal_pinjam)")
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS log_pemeliharaan (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                waktu TEXT NOT NULL,
+                durasi REAL,
+                status TEXT,
+                keterangan TEXT
+            )
+        """)
         self.conn.commit()
 
     def _migrate_tables(self):
@@ -60,6 +419,8 @@ class DatabaseManager:
             self.cursor.execute("INSERT INTO anggota (nama_lengkap, tahun_lahir, jenis_kelamin, nomor_telepon, alamat) VALUES (?, ?, ?, ?, ?)",
                                 (nama, tahun_lahir, jk, telepon, alamat))
             self.conn.commit()
+            self._fuzzy_update("anggota", self.cursor.lastrowid, nama)
+            self._changed("anggota")
             return True
         except Exception: return False
 
@@ -71,6 +432,8 @@ class DatabaseManager:
                 WHERE id=?
             """, (nama, tahun, jk, telp, alamat, id_anggota))
             self.conn.commit()
+            self._fuzzy_update("anggota", id_anggota, nama)
+            self._changed("anggota")
             return True
         except Exception: return False
 
@@ -87,13 +450,27 @@ class DatabaseManager:
         return self.cursor.fetchall()
     
     def search_anggota_for_pinjam(self, term):
-        term = f"%{term}%"
-        self.cursor.execute("""
-            SELECT id, nama_lengkap FROM anggota 
-            WHERE nama_lengkap LIKE ? OR CAST(id AS TEXT) LIKE ?
-            ORDER BY nama_lengkap ASC
-        """, (term, term))
-        return self.cursor.fetchall()
+        # Dipanggil tiap ketikan untuk mengisi OptionMenu: yang diambil dari database hanya FUZZY_LIMIT baris teratas
+        term = term.strip()
+        term_wildcard = f"%{term}%"
+        index = self._fuzzy_index("anggota")
+        persis = index.substring(term) if index.sizes and not term.isdigit() else None
+        if persis is None:
+            # Nomor anggota, kata kunci < 3 huruf, atau index masih dibangun
+            self.cursor.execute("""
+                SELECT id, nama_lengkap FROM anggota WHERE nama_lengkap LIKE ? OR CAST(id AS TEXT) LIKE ?
+                ORDER BY nama_lengkap ASC LIMIT ?
+            """, (term_wildcard, term_wildcard, FUZZY_LIMIT))
+            return self.cursor.fetchall()
+
+        # Cocok substring di atas, lalu sisa hasil fuzzy; kemiripan lalu nama sebagai pemecah seri
+        skor = index.search(term)
+        nama = index.nama
+        ids = heapq.nsmallest(FUZZY_LIMIT, persis | skor.keys(), key=lambda id: (id not in persis, -skor.get(id, 0), nama[id]))
+        if not ids: return []
+        self.cursor.execute(f"SELECT id, nama_lengkap FROM anggota WHERE id IN ({','.join('?' * len(ids))})", ids)
+        rows = dict(self.cursor.fetchall())
+        return [(id, rows[id]) for id in ids if id in rows]
 
     def search_anggota(self, term, sort_by="ID (Terbaru)"):
         term_wildcard = f"%{term}%"
@@ -104,24 +481,76 @@ class DatabaseManager:
             "Tahun Lahir (Terbaru)": "tahun_lahir DESC"
         }
         order_clause = sort_map.get(sort_by, "id DESC")
+        if not term:
+            self.cursor.execute(f"SELECT * FROM anggota ORDER BY {order_clause}")
+            return self.cursor.fetchall()
+
+        skor = self._fuzzy_index("anggota").search(term)
         self.cursor.execute(f"""
             SELECT * FROM anggota 
             WHERE nama_lengkap LIKE ? OR nomor_telepon LIKE ? OR alamat LIKE ? OR CAST(id AS TEXT) LIKE ?
+               OR id IN ({",".join("?" * len(skor))})
             ORDER BY {order_clause}
-        """, (term_wildcard, term_wildcard, term_wildcard, term_wildcard))
+        """, (term_wildcard, term_wildcard, term_wildcard, term_wildcard, *skor))
+        # Urutan bawaan (ID terbaru) diganti urutan kemiripan; urutan lain yang dipilih tetap berlaku di tiap tingkat
+        return self._rank(self.cursor.fetchall(), term, skor, (0, 1, 4, 5), per_skor=order_clause == "id DESC")
+
+    def count_pinjaman_aktif(self, anggota_id):
+        self.cursor.execute("SELECT COUNT(*) FROM peminjaman WHERE anggota_id = ? AND tanggal_kembali IS NULL", (anggota_id,))
+        return self.cursor.fetchone()[0]
+
+    def _batas_terlambat(self):
+        return (datetime.now() - timedelta(days=LAMA_PINJAM_HARI)).strftime("%Y-%m-%d")
+
+    def get_ringkasan_anggota(self, anggota_id):
+        self.cursor.execute("""
+            SELECT COUNT(*),
+                   COALESCE(SUM(tanggal_kembali IS NULL), 0),
+                   COALESCE(SUM(tanggal_kembali IS NULL AND tanggal_pinjam < ?), 0)
+            FROM peminjaman WHERE anggota_id = ?
+        """, (self._batas_terlambat(), anggota_id))
+        return self.cursor.fetchone()
+
+    def get_pinjaman_aktif_anggota(self, anggota_id):
+        self.cursor.execute("""
+            SELECT p.id, b.judul, p.tanggal_pinjam, p.tanggal_pinjam < ?
+            FROM peminjaman p
+            JOIN buku b ON p.buku_id = b.id
+            WHERE p.anggota_id = ? AND p.tanggal_kembali IS NULL
+            ORDER BY p.tanggal_pinjam ASC
+        """, (self._batas_terlambat(), anggota_id))
+        return self.cursor.fetchall()
+
+    def get_riwayat_anggota(self, anggota_id, sebelum=None, limit=RIWAYAT_PAGE_SIZE):
+        # Paging keyset (tanggal_pinjam, id) di atas idx_peminjaman_anggota, tanpa OFFSET
+        query = """
+            SELECT p.id, b.judul, p.tanggal_pinjam, p.tanggal_kembali, p.catatan
+            FROM peminjaman p
+            JOIN buku b ON p.buku_id = b.id
+            WHERE p.anggota_id = ? AND p.tanggal_kembali IS NOT NULL
+        """
+        params = [anggota_id]
+        if sebelum:
+            query += " AND (p.tanggal_pinjam < ? OR (p.tanggal_pinjam = ? AND p.id < ?))"
+            params += [sebelum[0], sebelum[0], sebelum[1]]
+        query += " ORDER BY p.tanggal_pinjam DESC, p.id DESC LIMIT ?"
+        params.append(limit)
+        self.cursor.execute(query, params)
         return self.cursor.fetchall()
 
     def pinjam_buku(self, buku_id, anggota_id):
         try:
+            if self.count_pinjaman_aktif(anggota_id) >= BATAS_PINJAM: return "Batas"
             self.cursor.execute("UPDATE buku SET status = 'Dipinjam' WHERE id = ?", (buku_id,))
             tanggal_pinjam = datetime.now().strftime("%Y-%m-%d")
             self.cursor.execute("INSERT INTO peminjaman (buku_id, anggota_id, tanggal_pinjam) VALUES (?, ?, ?)",
                                 (buku_id, anggota_id, tanggal_pinjam))
             self.conn.commit()
-            return True
+            self._changed("buku", "peminjaman")
+            return "Sukses"
         except Exception:
             self.conn.rollback()
-            return False
+            return "Gagal"
 
     def get_peminjaman_by_buku_id(self, buku_id):
         try:
@@ -149,9 +578,11 @@ class DatabaseManager:
                 peminjaman_id = row[0]
                 self.cursor.execute("UPDATE peminjaman SET tanggal_kembali = ?, catatan = ? WHERE id = ?", (tanggal_kembali, catatan, peminjaman_id))
                 self.conn.commit()
+                self._changed("buku", "peminjaman")
                 return True
             else:
                 self.conn.commit()
+                self._changed("buku")
                 return False
         except Exception:
             self.conn.rollback()
@@ -162,6 +593,8 @@ class DatabaseManager:
             self.cursor.execute("INSERT INTO buku (judul, penulis, kategori, tahun, status) VALUES (?, ?, ?, ?, ?)",
                                 (judul, penulis, kategori, tahun, "Tersedia"))
             self.conn.commit()
+            self._fuzzy_update("penulis", self.cursor.lastrowid, penulis)
+            self._changed("buku")
             return True
         except Exception: return False
 
@@ -185,6 +618,8 @@ class DatabaseManager:
             self.cursor.execute("UPDATE buku SET judul=?, penulis=?, kategori=?, tahun=? WHERE id=?", 
                                 (judul, penulis, kategori, tahun, buku_id))
             self.conn.commit()
+            self._fuzzy_update("penulis", buku_id, penulis)
+            self._changed("buku")
             return True
         except Exception: return False
 
@@ -201,19 +636,27 @@ class DatabaseManager:
             self.cursor.execute("DELETE FROM peminjaman WHERE buku_id = ?", (buku_id,))
             self.cursor.execute("DELETE FROM buku WHERE id = ?", (buku_id,))
             self.conn.commit()
+            self._fuzzy_update("penulis", buku_id)
+            self._changed("buku", "peminjaman")
             return "Sukses"
         except Exception:
             self.conn.rollback()
             return "Gagal"
 
+    def reset_status_buku(self, buku_id):
+        self.cursor.execute("UPDATE buku SET status='Tersedia' WHERE id=?", (buku_id,))
+        self.conn.commit()
+        self._changed("buku")
+
     def search_buku(self, term):
-        term = f"%{term}%"
-        self.cursor.execute("""
+        skor = self._fuzzy_index("penulis").search(term) if term else {}
+        term_wildcard = f"%{term}%"
+        self.cursor.execute(f"""
             SELECT * FROM buku 
-            WHERE judul LIKE ? OR penulis LIKE ? OR kategori LIKE ?
+            WHERE judul LIKE ? OR penulis LIKE ? OR kategori LIKE ? OR id IN ({",".join("?" * len(skor))})
             ORDER BY id DESC
-        """, (term, term, term))
-        return self.cursor.fetchall()
+        """, (term_wildcard, term_wildcard, term_wildcard, *skor))
+        return self._rank(self.cursor.fetchall(), term, skor, (1, 2, 3))
 
     def get_history(self, filter_type="Terbaru"):
         query = """
@@ -234,11 +677,275 @@ class DatabaseManager:
         self.cursor.execute(query)
         return self.cursor.fetchall()
 
+    def _ukuran_db(self, conn):
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return page_size * page_count, page_size * freelist
+
+    def backup_database(self, tujuan=None, progress=None, conn=None):
+        # Backup online lewat sqlite3 backup API, disalin per blok halaman supaya GUI tetap bisa menulis
+        mulai = time.perf_counter()
+        folder = os.path.join(os.path.dirname(os.path.abspath(self.db_name)), BACKUP_DIR)
+        nama = os.path.splitext(os.path.basename(self.db_name))[0]
+        if tujuan is None:
+            os.makedirs(folder, exist_ok=True)
+            tujuan = os.path.join(folder, f"{nama}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+
+        src = conn or sqlite3.connect(self.db_name, timeout=30)
+        dst = sqlite3.connect(tujuan)
+        try:
+            src.backup(dst, pages=BACKUP_PAGES_PER_STEP, progress=progress, sleep=0.005)
+        finally:
+            dst.close()
+            if conn is None: src.close()
+
+        hasil = {"file": tujuan, "ukuran": os.path.getsize(tujuan), "durasi": time.perf_counter() - mulai}
+
+        # Rotasi hanya untuk backup otomatis milik database ini (nama_YYYYmmdd_HHMMSS.db)
+        if os.path.dirname(os.path.abspath(tujuan)) == folder:
+            pola = re.compile(re.escape(nama) + r"_\d{8}_\d{6}\.db")
+            lama = sorted(f for f in os.listdir(folder) if pola.fullmatch(f) and f != os.path.basename(tujuan))
+            for f in lama[:max(0, len(lama) - (BACKUP_SIMPAN - 1))]:
+                try: os.remove(os.path.join(folder, f))
+                except OSError: pass
+
+        return hasil
+
+    def jalankan_pemeliharaan(self, backup=True, progress=None):
+        # Memakai koneksi sendiri agar bisa dijalankan dari thread di luar GUI
+        laporan = {}
+        mulai = time.perf_counter()
+        conn = sqlite3.connect(self.db_name, timeout=30)
+        try:
+            laporan["ukuran_awal"], _ = self._ukuran_db(conn)
+
+            if backup:
+                laporan["backup"] = self.backup_database(progress=progress, conn=conn)
+
+            # Konversi sekali ke auto_vacuum=INCREMENTAL (butuh VACUUM penuh), agar ruang bekas hapus
+            # selanjutnya bisa diambil kembali sedikit demi sedikit
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # Dilaporkan sebagai ukuran sebelum -> sesudah: halaman pointer-map auto_vacuum bisa membuat
+                # file justru sedikit lebih besar, jadi selisihnya tidak selalu berarti ruang yang dibebaskan
+                t = time.perf_counter()
+                sebelum, kosong = self._ukuran_db(conn)
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                sesudah, _ = self._ukuran_db(conn)
+                laporan["konversi"] = {"sebelum": sebelum, "sesudah": sesudah, "kosong": kosong, "durasi": time.perf_counter() - t}
+
+            t = time.perf_counter()
+            _, bebas_awal = self._ukuran_db(conn)
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                sisa = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                while sisa > 0:
+                    conn.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP})").fetchall()
+                    conn.commit()
+                    baru = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                    if baru >= sisa: break
+                    sisa = baru
+                    time.sleep(0.005)
+            _, bebas_akhir = self._ukuran_db(conn)
+            laporan["vacuum"] = {"dibebaskan": bebas_awal - bebas_akhir, "durasi": time.perf_counter() - t}
+
+            t = time.perf_counter()
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+            conn.commit()
+            laporan["optimize"] = {"durasi": time.perf_counter() - t}
+
+            t = time.perf_counter()
+            pesan = [r[0] for r in conn.execute("PRAGMA integrity_check").fetchall()]
+            laporan["integritas"] = {"ok": pesan == ["ok"], "pesan": pesan, "durasi": time.perf_counter() - t}
+
+            laporan["ukuran_akhir"], _ = self._ukuran_db(conn)
+            laporan["durasi"] = time.perf_counter() - mulai
+
+            conn.execute("INSERT INTO log_pemeliharaan (waktu, durasi, status, keterangan) VALUES (?, ?, ?, ?)",
+                         (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), laporan["durasi"],
+                          "OK" if laporan["integritas"]["ok"] else "RUSAK", "; ".join(pesan[:5])))
+            conn.commit()
+        except Exception as e:
+            # Yang gagal juga dicatat, supaya jadwal otomatis tidak mengulang (dan memperingatkan) tiap beberapa menit
+            try:
+                conn.execute("INSERT INTO log_pemeliharaan (waktu, durasi, status, keterangan) VALUES (?, ?, ?, ?)",
+                             (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), time.perf_counter() - mulai, "GAGAL", str(e)[:200]))
+                conn.commit()
+            except sqlite3.Error: pass
+            raise
+        finally:
+            conn.close()
+        return laporan
+
+    def get_last_pemeliharaan(self):
+        self.cursor.execute("SELECT waktu, durasi, status FROM log_pemeliharaan ORDER BY id DESC LIMIT 1")
+        return self.cursor.fetchone()
+
+    def perlu_pemeliharaan(self):
+        last = self.get_last_pemeliharaan()
+        if not last: return True
+        selisih = datetime.now() - datetime.strptime(last[0], "%Y-%m-%d %H:%M:%S")
+        return selisih.total_seconds() >= MAINTENANCE_INTERVAL_JAM * 3600
+
+    def parse_periode(self, periode):
+        # "YYYY-MM" = satu bulan, "YYYY" = satu tahun; hasil (mulai, akhir) dengan akhir eksklusif
+        if len(periode) == 4:
+            tahun = int(periode)
+            return f"{tahun}-01-01", f"{tahun + 1}-01-01"
+        mulai = datetime.strptime(periode, "%Y-%m")
+        akhir = (mulai + timedelta(days=32)).replace(day=1)
+        return mulai.strftime("%Y-%m-%d"), akhir.strftime("%Y-%m-%d")
+
+    def _laporan_sections(self, jenis, mulai, akhir):
+        # Tiap bagian: (judul, kolom, lebar, sql, params, hitung). hitung = query COUNT ringan di atas index
+        # untuk progress bar; None untuk agregat yang hasilnya hanya beberapa baris
+        hari_ini = datetime.now().strftime("%Y-%m-%d")
+        if jenis == "kategori":
+            return [("Peminjaman per Kategori", ["Kategori", "Jumlah Pinjam", "Belum Kembali", "Peminjam Unik"], [3, 1, 1, 1], """
+                SELECT COALESCE(b.kategori, '-'), COUNT(*), SUM(p.tanggal_kembali IS NULL), COUNT(DISTINCT p.anggota_id)
+                FROM peminjaman p JOIN buku b ON p.buku_id = b.id
+                WHERE p.tanggal_pinjam >= ? AND p.tanggal_pinjam < ?
+                GROUP BY 1 ORDER BY 2 DESC
+            """, (mulai, akhir), None)]
+        if jenis == "terlambat":
+            return [(f"Terlambat per {hari_ini} (lebih dari {LAMA_PINJAM_HARI} hari)", ["ID", "Peminjam", "Telepon", "Buku", "Tgl Pinjam", "Telat (hari)"], [1, 4, 2, 5, 2, 2], """
+                SELECT p.id, a.nama_lengkap, a.nomor_telepon, b.judul, p.tanggal_pinjam,
+                       CAST(julianday(?) - julianday(p.tanggal_pinjam) AS INTEGER) - ?
+                FROM peminjaman p
+                JOIN buku b ON p.buku_id = b.id
+                JOIN anggota a ON p.anggota_id = a.id
+                WHERE p.tanggal_kembali IS NULL AND p.tanggal_pinjam < ?
+                ORDER BY p.tanggal_pinjam ASC
+            """, (hari_ini, LAMA_PINJAM_HARI, self._batas_terlambat()),
+                ("SELECT COUNT(*) FROM peminjaman WHERE tanggal_kembali IS NULL AND tanggal_pinjam < ?", (self._batas_terlambat(),)))]
+        if jenis == "inventaris":
+            return [(f"Inventaris per {hari_ini}", ["Kategori", "Tersedia", "Dipinjam", "Total"], [3, 1, 1, 1], """
+                SELECT COALESCE(kategori, '-'), SUM(status = 'Tersedia'), SUM(status = 'Dipinjam'), COUNT(*)
+                FROM buku GROUP BY 1 ORDER BY 1
+            """, (), None)]
+        if jenis == "transaksi":
+            return [("Log Transaksi", ["ID", "Tgl Pinjam", "Buku", "Peminjam", "Tgl Kembali", "Catatan"], [1, 2, 5, 4, 2, 4], """
+                SELECT p.id, p.tanggal_pinjam, b.judul, a.nama_lengkap, p.tanggal_kembali, p.catatan
+                FROM peminjaman p
+                JOIN buku b ON p.buku_id = b.id
+                JOIN anggota a ON p.anggota_id = a.id
+                WHERE p.tanggal_pinjam >= ? AND p.tanggal_pinjam < ?
+                ORDER BY p.tanggal_pinjam ASC, p.id ASC
+            """, (mulai, akhir),
+                ("SELECT COUNT(*) FROM peminjaman WHERE tanggal_pinjam >= ? AND tanggal_pinjam < ?", (mulai, akhir)))]
+        raise ValueError(f"Jenis laporan tidak dikenal: {jenis}")
+
+    def buat_laporan(self, jenis, periode=None, fmt="html", tujuan=None, progress=None):
+        # Query dibaca per LAPORAN_FETCH baris dan ditulis per halaman; memakai koneksi sendiri agar aman dari thread
+        mulai_t = time.perf_counter()
+        periode = periode or (datetime.now().replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+        mulai, akhir = self.parse_periode(periode)
+        if tujuan is None:
+            folder = os.path.join(os.path.dirname(os.path.abspath(self.db_name)), LAPORAN_DIR)
+            os.makedirs(folder, exist_ok=True)
+            tujuan = os.path.join(folder, f"{jenis}_{periode}.{fmt}")
+
+        conn = sqlite3.connect(self.db_name, timeout=30)
+        try:
+            sections = self._laporan_sections(jenis, mulai, akhir)
+            total = sum(conn.execute(*hitung).fetchone()[0] for *_, hitung in sections if hitung)
+            keterangan = f"Periode {mulai} s/d {(datetime.strptime(akhir, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')}  |  Dibuat {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+
+            if fmt == "pdf": f, writer_cls = open(tujuan, "wb"), PDFReportWriter
+            else: f, writer_cls = open(tujuan, "w", encoding="utf-8"), HTMLReportWriter
+            selesai = baris = 0
+            with f:
+                writer = writer_cls(f, JENIS_LAPORAN[jenis], keterangan)
+                for judul, kolom, lebar, sql, params, hitung in sections:
+                    writer.section(judul, kolom, lebar)
+                    cur = conn.execute(sql, params)
+                    while True:
+                        rows = cur.fetchmany(LAPORAN_FETCH)
+                        if not rows: break
+                        for r in rows: writer.row(r)
+                        baris += len(rows)
+                        if hitung: selesai = min(selesai + len(rows), total)
+                        if progress: progress(selesai, total)
+                writer.close()
+        finally:
+            conn.close()
+        return {"file": tujuan, "baris": baris, "halaman": writer.halaman, "durasi": time.perf_counter() - mulai_t}
+
+    def ringkas_laporan(self, laporan):
+        baris = []
+        if "backup" in laporan:
+            b = laporan["backup"]
+            baris.append(f"Backup: {os.path.basename(b['file'])} ({b['ukuran'] / 1024:.1f} KB, {b['durasi']:.2f} dtk)")
+        if "konversi" in laporan:
+            k = laporan["konversi"]
+            baris.append(f"Konversi auto_vacuum (VACUUM penuh): {k['sebelum'] / 1024:.1f} KB -> {k['sesudah'] / 1024:.1f} KB, "
+                         f"{k['kosong'] / 1024:.1f} KB halaman kosong dipadatkan ({k['durasi']:.2f} dtk)")
+        v = laporan["vacuum"]
+        baris.append(f"Vacuum: {v['dibebaskan'] / 1024:.1f} KB dibebaskan ({v['durasi']:.2f} dtk)")
+        baris.append(f"Optimize/ANALYZE: {laporan['optimize']['durasi']:.2f} dtk")
+        i = laporan["integritas"]
+        baris.append(f"Integritas: {'OK' if i['ok'] else 'BERMASALAH - ' + '; '.join(i['pesan'][:3])} ({i['durasi']:.2f} dtk)")
+        baris.append(f"Ukuran DB: {laporan['ukuran_awal'] / 1024:.1f} KB -> {laporan['ukuran_akhir'] / 1024:.1f} KB")
+        baris.append(f"Total: {laporan['durasi']:.2f} dtk")
+        return "\n".join(baris)
+
+
+class RowPool:
+    """Baris tabel di dalam CTkScrollableFrame yang dipakai ulang antar reload.
+
+    Header, label kosong dan frame tiap baris dibuat sekali; reload hanya mengubah isi
+    widget lewat fill_row, baris yang tidak terpakai disembunyikan (bukan di-destroy).
+    """
+    def __init__(self, parent, col_names, col_widths, build_row, fill_row, font, empty_text):
+        self.parent = parent
+        self.col_widths = col_widths
+        self.build_row = build_row
+        self.fill_row = fill_row
+        self.rows = []
+        self.visible = 0
+
+        self.header = ctk.CTkFrame(parent, fg_color="gray25")
+        for i, c in enumerate(col_names):
+            ctk.CTkLabel(self.header, text=c, width=col_widths[i], text_color="white", font=font(weight="bold")).grid(row=0, column=i, padx=2, pady=5)
+        self.empty_label = ctk.CTkLabel(parent, text=empty_text)
+        self.header_shown = False
+        self.empty_shown = False
+
+    def _new_row(self, i):
+        row_color = ("gray90", "gray20") if i % 2 == 0 else ("gray85", "gray17")
+        rf = ctk.CTkFrame(self.parent, fg_color=row_color)
+        widgets = self.build_row(rf, self.col_widths)
+        widgets["frame"] = rf
+        return widgets
+
+    def render(self, data):
+        if not data:
+            for row in self.rows[:self.visible]: row["frame"].pack_forget()
+            self.visible = 0
+            if self.header_shown: self.header.pack_forget(); self.header_shown = False
+            if not self.empty_shown: self.empty_label.pack(pady=10); self.empty_shown = True
+            return
+
+        if self.empty_shown: self.empty_label.pack_forget(); self.empty_shown = False
+        if not self.header_shown: self.header.pack(fill="x", padx=5, pady=(5, 0)); self.header_shown = True
+
+        for i, record in enumerate(data):
+            if i == len(self.rows): self.rows.append(self._new_row(i))
+            row = self.rows[i]
+            self.fill_row(row, record)
+            if i >= self.visible: row["frame"].pack(fill="x", padx=5, pady=2)
+
+        for row in self.rows[len(data):self.visible]: row["frame"].pack_forget()
+        self.visible = len(data)
+
 
 class App(ctk.CTk):
-    def __init__(self):
+    def __init__(self, db_name="perpustakaan_final.db"):
         super().__init__()
-        self.db = DatabaseManager()
+        self.db = DatabaseManager(db_name)
+        self.db.warm_fuzzy_index()
+        self.fonts = {}
         self.title("📚 Sistem Manajemen Perpustakaan Pro v8.5")
         self.geometry("1100x650") 
         ctk.set_appearance_mode("System")
@@ -251,7 +958,7 @@ class App(ctk.CTk):
         self.sidebar_frame.grid(row=0, column=0, rowspan=4, sticky="nsew")
         self.sidebar_frame.grid_rowconfigure(4, weight=1)
         
-        ctk.CTkLabel(self.sidebar_frame, text="Perpustakaan\nMini v8.5", font=ctk.CTkFont(size=20, weight="bold")).pack(pady=(20, 10))
+        ctk.CTkLabel(self.sidebar_frame, text="Perpustakaan\nMini v8.5", font=self.font(size=20, weight="bold")).pack(pady=(20, 10))
         
         self.btn_inactive = "gray30" 
         self.btn_active = "#1f6aa5" 
@@ -265,30 +972,209 @@ class App(ctk.CTk):
         self.history_button = ctk.CTkButton(self.sidebar_frame, text="📜  Riwayat", height=40, fg_color=self.btn_inactive, anchor="w", command=lambda: self.select_frame("history"))
         self.history_button.pack(padx=10, pady=5, fill="x")
 
+        self.report_button = ctk.CTkButton(self.sidebar_frame, text="📊  Laporan", height=40, fg_color=self.btn_inactive, anchor="w", command=self.open_laporan_window)
+        self.report_button.pack(padx=10, pady=5, fill="x")
+
+        self.maintenance_button = ctk.CTkButton(self.sidebar_frame, text="🛠  Pemeliharaan", height=40, fg_color=self.btn_inactive, anchor="w", command=self.run_maintenance_ui)
+        self.maintenance_button.pack(padx=10, pady=5, fill="x", side="bottom")
+        self.maintenance_thread = None
+
         self.main_content_frame = ctk.CTkFrame(self, corner_radius=0)
         self.main_content_frame.grid(row=0, column=1, sticky="nsew", padx=10, pady=10)
         
         self.main_content_frame.grid_columnconfigure(0, weight=1)
         self.main_content_frame.grid_rowconfigure(0, weight=1) 
 
+        self.frames = {}
+        self.current_frame = None
+        self.dirty = {name: True for name in TAB_TABLES}
+        # Kata kunci/urutan/filter terakhir yang benar-benar ditampilkan tiap tab, diputar ulang saat refresh
+        self.last_query = {}
+        self.db.listeners.append(self.mark_dirty)
         self.select_frame("buku")
+        last = self.db.get_last_pemeliharaan()
+        if last: self.tandai_pemeliharaan(last[2] != "OK")
+        self.after(5000, self.check_maintenance_schedule)
         
     def select_frame(self, name):
         self.buku_button.configure(fg_color=self.btn_inactive)
         self.anggota_button.configure(fg_color=self.btn_inactive)
         self.history_button.configure(fg_color=self.btn_inactive)
 
-        for widget in self.main_content_frame.winfo_children(): widget.destroy()
+        # Frame tiap tab dibuat sekali lalu hanya disembunyikan, supaya pool baris tetap terpakai
+        for frame in self.frames.values(): frame.grid_remove()
 
         if name == "buku":
             self.buku_button.configure(fg_color=self.btn_active)
-            self.create_buku_frame()
+            if "buku" not in self.frames: self.frames["buku"] = self.create_buku_frame()
         elif name == "anggota":
             self.anggota_button.configure(fg_color=self.btn_active)
-            self.create_anggota_frame()
+            if "anggota" not in self.frames: self.frames["anggota"] = self.create_anggota_frame()
         elif name == "history":
             self.history_button.configure(fg_color=self.btn_active)
-            self.create_history_frame()
+            if "history" not in self.frames: self.frames["history"] = self.create_history_frame()
+
+        self.current_frame = name
+        self.frames[name].grid()
+        if self.dirty[name]: self.refresh_frame(name)
+
+    def mark_dirty(self, tables):
+        for name, deps in TAB_TABLES.items():
+            if deps & tables: self.dirty[name] = True
+        # Tab yang sedang tampil langsung disegarkan (sekali saja walau ada beberapa tulis beruntun)
+        if self.current_frame and self.dirty[self.current_frame]:
+            self.after_idle(self.refresh_frame, self.current_frame)
+
+    def refresh_frame(self, name):
+        if not self.dirty[name] or name not in self.frames: return
+        # Ulangi query terakhir yang ditampilkan (bukan isi kotak pencarian yang mungkin belum dijalankan),
+        # posisi scroll dipertahankan
+        list_frame = {"buku": self.buku_list_frame, "anggota": self.anggota_list_frame, "history": self.hist_list}[name]
+        pos = self.scroll_pos(list_frame)
+        q = self.last_query.get(name)
+        if name == "buku":
+            term, sort = q or ("", None)
+            if term: self.search_buku_ui(term)
+            else: self.load_buku_data(sort)
+        elif name == "anggota":
+            self.show_anggota(*(q or ("", self.anggota_sort_var.get())))
+        elif name == "history":
+            self.load_history(q or self.filt_var.get())
+        self.update_idletasks()
+        self.scroll_pos(list_frame, pos)
+
+    def scroll_pos(self, list_frame, pos=None):
+        # CTkScrollableFrame tidak punya API posisi scroll; canvas internalnya hanya diakses di sini
+        canvas = list_frame._parent_canvas
+        if pos is None: return canvas.yview()[0]
+        canvas.yview_moveto(pos)
+
+    def font(self, size=None, weight="normal"):
+        # Satu objek CTkFont per kombinasi ukuran/ketebalan, dipakai bersama semua widget
+        key = (size, weight)
+        if key not in self.fonts: self.fonts[key] = ctk.CTkFont(size=size, weight=weight)
+        return self.fonts[key]
+
+    def tandai_pemeliharaan(self, gagal):
+        # Tanda merah di sidebar bertahan sampai pemeliharaan berikutnya berhasil
+        self.maintenance_button.configure(text="⚠️  Pemeliharaan" if gagal else "🛠  Pemeliharaan",
+                                          fg_color="red" if gagal else self.btn_inactive)
+
+    def check_maintenance_schedule(self):
+        try:
+            if self.db.perlu_pemeliharaan(): self.run_maintenance_ui(silent=True)
+        except Exception: pass
+        self.after(MAINTENANCE_CHECK_MS, self.check_maintenance_schedule)
+
+    def run_maintenance_ui(self, silent=False):
+        if self.maintenance_thread and self.maintenance_thread.is_alive():
+            if not silent: messagebox.showinfo("Info", "Pemeliharaan sedang berjalan.")
+            return
+
+        status = {"progress": 0.0, "hasil": None, "error": None}
+
+        def progress(_, remaining, total):
+            status["progress"] = (total - remaining) / total if total else 1.0
+
+        def worker():
+            try: status["hasil"] = self.db.jalankan_pemeliharaan(progress=progress)
+            except Exception as e: status["error"] = str(e)
+
+        win = None
+        if not silent:
+            win = ctk.CTkToplevel(self)
+            win.title("Pemeliharaan Database")
+            win.geometry("400x150")
+            ctk.CTkLabel(win, text="Backup, vacuum & cek integritas...", font=self.font(weight="bold")).pack(pady=(20, 10))
+            bar = ctk.CTkProgressBar(win)
+            bar.pack(fill="x", padx=20)
+            bar.set(0)
+
+        self.maintenance_button.configure(state="disabled")
+        self.maintenance_thread = threading.Thread(target=worker, daemon=True)
+        self.maintenance_thread.start()
+
+        def poll():
+            if self.maintenance_thread.is_alive():
+                if win is not None and win.winfo_exists(): bar.set(status["progress"])
+                return self.after(200, poll)
+
+            # Run otomatis (silent) tetap memperingatkan kalau gagal atau database rusak
+            rusak = status["error"] is None and not status["hasil"]["integritas"]["ok"]
+            self.maintenance_button.configure(state="normal")
+            self.tandai_pemeliharaan(status["error"] is not None or rusak)
+            if win is not None: self.close_win(win)
+            judul = "Pemeliharaan Otomatis" if silent else "Pemeliharaan"
+            if status["error"]:
+                messagebox.showerror("Gagal", f"{judul} gagal: {status['error']}")
+            elif rusak:
+                messagebox.showwarning(f"{judul}: Integritas Bermasalah", self.db.ringkas_laporan(status["hasil"]))
+            elif not silent:
+                messagebox.showinfo("Pemeliharaan Selesai", self.db.ringkas_laporan(status["hasil"]))
+
+        poll()
+
+    def open_laporan_window(self):
+        win = ctk.CTkToplevel(self)
+        win.title("Buat Laporan")
+        win.geometry("350x380")
+        win.grab_set()
+
+        ctk.CTkLabel(win, text="Laporan Bulanan / Tahunan", font=self.font(size=16, weight="bold")).pack(pady=10)
+
+        nama_ke_jenis = {v: k for k, v in JENIS_LAPORAN.items()}
+        ctk.CTkLabel(win, text="Jenis Laporan:").pack(anchor="w", padx=20)
+        jenis_var = ctk.StringVar(value=JENIS_LAPORAN["kategori"])
+        ctk.CTkOptionMenu(win, values=list(JENIS_LAPORAN.values()), variable=jenis_var).pack(fill="x", padx=20, pady=(0, 10))
+
+        ctk.CTkLabel(win, text="Periode (YYYY-MM atau YYYY):").pack(anchor="w", padx=20)
+        e_periode = ctk.CTkEntry(win)
+        e_periode.insert(0, (datetime.now().replace(day=1) - timedelta(days=1)).strftime("%Y-%m"))
+        e_periode.pack(fill="x", padx=20, pady=(0, 10))
+
+        ctk.CTkLabel(win, text="Format:").pack(anchor="w", padx=20)
+        fmt_var = ctk.StringVar(value="html")
+        ctk.CTkSegmentedButton(win, values=["html", "pdf"], variable=fmt_var).pack(padx=20, pady=(0, 10))
+
+        bar = ctk.CTkProgressBar(win)
+        bar.pack(fill="x", padx=20, pady=10)
+        bar.set(0)
+
+        def buat():
+            periode = e_periode.get().strip()
+            try: self.db.parse_periode(periode)
+            except ValueError: return messagebox.showerror("Error", "Periode harus YYYY-MM atau YYYY.")
+
+            status = {"progress": 0.0, "hasil": None, "error": None}
+
+            def progress(selesai, total):
+                status["progress"] = selesai / total if total else 1.0
+
+            def worker():
+                try: status["hasil"] = self.db.buat_laporan(nama_ke_jenis[jenis_var.get()], periode, fmt_var.get(), progress=progress)
+                except Exception as e: status["error"] = str(e)
+
+            btn.configure(state="disabled")
+            thread = threading.Thread(target=worker, daemon=True)
+            thread.start()
+
+            def poll():
+                if not win.winfo_exists(): return
+                bar.set(status["progress"])
+                if thread.is_alive(): return self.after(200, poll)
+
+                btn.configure(state="normal")
+                if status["error"]: return messagebox.showerror("Gagal", f"Laporan gagal dibuat: {status['error']}")
+                h = status["hasil"]
+                bar.set(1)
+                if messagebox.askyesno("Laporan Selesai", f"{h['file']}\n{h['baris']} baris, {h['halaman']} halaman, {h['durasi']:.1f} dtk\n\nBuka laporan?"):
+                    webbrowser.open("file://" + os.path.abspath(h["file"]))
+
+            poll()
+
+        btn = ctk.CTkButton(win, text="Buat Laporan", command=buat)
+        btn.pack(pady=10)
+        win.protocol("WM_DELETE_WINDOW", lambda: self.close_win(win))
 
     def close_win(self, window):
         try:
@@ -323,8 +1209,11 @@ class App(ctk.CTk):
 
         self.buku_list_frame = ctk.CTkScrollableFrame(self.buku_frame, label_text="Daftar Buku")
         self.buku_list_frame.grid(row=1, column=0, padx=0, pady=0, sticky="nsew")
-        
-        self.load_buku_data()
+
+        self.buku_pool = RowPool(self.buku_list_frame, ["ID", "Judul", "Penulis", "Kategori", "Tahun", "Status", "Aksi", "Edit"],
+                                 [40, 200, 150, 100, 60, 100, 80, 80], self.build_buku_row, self.fill_buku_row,
+                                 self.font, "Tidak ada buku yang ditemukan.")
+        return self.buku_frame
 
     def load_buku_data(self, sort_option=None):
         if not hasattr(self, 'buku_list_frame') or self.buku_list_frame is None: return 
@@ -332,74 +1221,63 @@ class App(ctk.CTk):
         current_sort = sort_option if sort_option else self.sort_var.get()
         data = self.db.get_all_buku(current_sort)
         self.render_rows(data) 
+        self.last_query["buku"] = ("", current_sort)
+        self.dirty["buku"] = False
 
     def render_rows(self, data):
-        for widget in self.buku_list_frame.winfo_children(): widget.destroy()
-
-        if not data:
-            ctk.CTkLabel(self.buku_list_frame, text="Tidak ada buku yang ditemukan.").pack(pady=10)
-            return
-
-        col_widths = [40, 200, 150, 100, 60, 100, 80, 80]
-        col_names = ["ID", "Judul", "Penulis", "Kategori", "Tahun", "Status", "Aksi", "Edit"]
-
-        header_frame = ctk.CTkFrame(self.buku_list_frame, fg_color="gray25", height=35)
-        header_frame.pack(fill="x", padx=5, pady=(5, 0))
-        
-        for i, name in enumerate(col_names):
-            lbl = ctk.CTkLabel(header_frame, text=name, width=col_widths[i], 
-                               text_color="white", font=ctk.CTkFont(weight="bold"))
-            lbl.grid(row=0, column=i, padx=2, pady=5)
-
-        for i, buku in enumerate(data):
-            row_color = ("gray90", "gray20") if i % 2 == 0 else ("gray85", "gray17")
-            row_frame = ctk.CTkFrame(self.buku_list_frame, fg_color=row_color, height=40)
-            row_frame.pack(fill="x", padx=5, pady=2)
-            
-            values = [
-                str(buku[0]), 
-                self.limit_text(buku[1], 25), 
-                self.limit_text(buku[2], 20), 
-                self.limit_text(buku[3], 12), 
-                str(buku[4]), 
-                buku[5]
-            ]
-
-            for j, val in enumerate(values):
-                lbl_color = "text_color"
-                font_style = None
-                text_col = None
-                if j == 5:
-                    text_col = "green" if val == "Tersedia" else "red"
-                    font_style = ctk.CTkFont(weight="bold")
-
-                lbl = ctk.CTkLabel(row_frame, text=val, width=col_widths[j], 
-                                   anchor="center", text_color=text_col, font=font_style)
-                lbl.grid(row=0, column=j, padx=2, pady=5)
-
-            btn_frame = ctk.CTkFrame(row_frame, fg_color="transparent", width=col_widths[6], height=30)
-            btn_frame.grid(row=0, column=6, padx=2)
-            btn_frame.grid_propagate(False)
-
-            if buku[5] == "Tersedia":
-                ctk.CTkButton(btn_frame, text="Pinjam", command=lambda id=buku[0]: self.open_pinjam_buku_window(id), 
-                              width=col_widths[6]-10, height=25).place(relx=0.5, rely=0.5, anchor="center")
-            else:
-                ctk.CTkButton(btn_frame, text="Kembali", command=lambda id=buku[0]: self.open_kembali_buku_window(id), 
-                              width=col_widths[6]-10, height=25, fg_color="orange").place(relx=0.5, rely=0.5, anchor="center")
-            
-            opt_frame = ctk.CTkFrame(row_frame, fg_color="transparent", width=col_widths[7], height=30)
-            opt_frame.grid(row=0, column=7, padx=2)
-            opt_frame.grid_propagate(False)
+        self.buku_pool.render(data)
+
+    def build_buku_row(self, rf, col_widths):
+        labels = []
+        for j in range(6):
+            lbl = ctk.CTkLabel(rf, text="", width=col_widths[j], anchor="center",
+                               font=self.font(weight="bold") if j == 5 else None)
+            lbl.grid(row=0, column=j, padx=2, pady=5)
+            labels.append(lbl)
+
+        btn_frame = ctk.CTkFrame(rf, fg_color="transparent", width=col_widths[6], height=30)
+        btn_frame.grid(row=0, column=6, padx=2)
+        btn_frame.grid_propagate(False)
+        btn = ctk.CTkButton(btn_frame, text="", width=col_widths[6]-10, height=25)
+        btn.place(relx=0.5, rely=0.5, anchor="center")
+
+        opt_frame = ctk.CTkFrame(rf, fg_color="transparent", width=col_widths[7], height=30)
+        opt_frame.grid(row=0, column=7, padx=2)
+        opt_frame.grid_propagate(False)
+        opt_var = ctk.StringVar(value="⚙️")
+        opt = ctk.CTkOptionMenu(opt_frame, values=["Edit Detail", "Hapus Buku"], variable=opt_var,
+                                width=col_widths[7]-10, height=25)
+        opt.place(relx=0.5, rely=0.5, anchor="center")
+
+        return {"labels": labels, "btn": btn, "opt": opt, "opt_var": opt_var}
+
+    def fill_buku_row(self, row, buku):
+        values = [
+            str(buku[0]), 
+            self.limit_text(buku[1], 25), 
+            self.limit_text(buku[2], 20), 
+            self.limit_text(buku[3], 12), 
+            str(buku[4]), 
+            buku[5]
+        ]
+        for lbl, val in zip(row["labels"], values): lbl.configure(text=val)
+        row["labels"][5].configure(text_color="green" if buku[5] == "Tersedia" else "red")
+
+        if buku[5] == "Tersedia":
+            row["btn"].configure(text="Pinjam", command=lambda id=buku[0]: self.open_pinjam_buku_window(id),
+                                 fg_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"])
+        else:
+            row["btn"].configure(text="Kembali", command=lambda id=buku[0]: self.open_kembali_buku_window(id), fg_color="orange")
 
-            opt_var = ctk.StringVar(value="⚙️")
-            ctk.CTkOptionMenu(opt_frame, values=["Edit Detail", "Hapus Buku"], 
-                              command=lambda c, id=buku[0]: self.handle_buku_action(c, id), 
-                              variable=opt_var, width=col_widths[7]-10, height=25).place(relx=0.5, rely=0.5, anchor="center")
+        row["opt_var"].set("⚙️")
+        row["opt"].configure(command=lambda c, id=buku[0]: self.handle_buku_action(c, id))
 
-    def search_buku_ui(self):
-        results = self.db.search_buku(self.search_entry.get().strip())
+    def search_buku_ui(self, term=None):
+        if term is None: term = self.search_entry.get().strip()
+        results = self.db.search_buku(term)
         self.render_rows(results)
+        self.last_query["buku"] = (term, None)
+        self.dirty["buku"] = False
 
     def open_add_buku_window(self):
         self.add_window = ctk.CTkToplevel(self)
@@ -407,7 +1285,7 @@ class App(ctk.CTk):
         self.add_window.geometry("350x450")
         self.add_window.grab_set() 
 
-        ctk.CTkLabel(self.add_window, text="Form Buku Baru", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=10)
+        ctk.CTkLabel(self.add_window, text="Form Buku Baru", font=self.font(size=16, weight="bold")).pack(pady=10)
         
         def create_inp(lbl, ph):
             ctk.CTkLabel(self.add_window, text=lbl).pack(padx=20, pady=(5,0), anchor="w")
@@ -428,7 +1306,6 @@ class App(ctk.CTk):
         if not all(vals): return messagebox.showerror("Error", "Isi semua data.")
         try:
             if self.db.add_buku(vals[0], vals[1], vals[2], int(vals[3])):
-                self.load_buku_data()
                 self.close_win(self.add_window)
         except: messagebox.showerror("Error", "Tahun harus angka.")
 
@@ -437,8 +1314,7 @@ class App(ctk.CTk):
         elif choice == "Hapus Buku": 
             if messagebox.askyesno("Hapus", "Yakin hapus buku ini?"):
                 res = self.db.delete_buku(buku_id)
-                if res == "Sukses": self.load_buku_data(self.sort_var.get())
-                else: messagebox.showerror("Gagal", res)
+                if res != "Sukses": messagebox.showerror("Gagal", res)
 
     def open_edit_buku_window(self, buku_id):
         b = self.db.get_buku_by_id(buku_id)
@@ -447,7 +1323,7 @@ class App(ctk.CTk):
         win.geometry("300x400")
         win.grab_set()
         
-        ctk.CTkLabel(win, text="Edit Detail Buku", font=ctk.CTkFont(weight="bold")).pack(pady=10)
+        ctk.CTkLabel(win, text="Edit Detail Buku", font=self.font(weight="bold")).pack(pady=10)
 
         def mk_e(lbl, val):
             ctk.CTkLabel(win, text=lbl).pack(pady=(5,0))
@@ -460,7 +1336,6 @@ class App(ctk.CTk):
             try:
                 tahun_int = int(e4.get())
                 if self.db.update_buku(buku_id, e1.get(), e2.get(), e3.get(), tahun_int):
-                    self.load_buku_data()
                     self.close_win(win)
                     messagebox.showinfo("Sukses", "Data buku diperbarui.")
                 else: messagebox.showerror("Error", "Gagal menyimpan.")
@@ -493,51 +1368,58 @@ class App(ctk.CTk):
 
         self.anggota_list_frame = ctk.CTkScrollableFrame(self.anggota_frame, label_text="List Anggota")
         self.anggota_list_frame.grid(row=1, column=0, padx=0, pady=0, sticky="nsew")
-        
-        self.search_anggota_ui() 
+
+        self.anggota_pool = RowPool(self.anggota_list_frame, ["ID", "Nama", "JK", "Tahun", "Telp", "Alamat", "Aksi", "Detail"],
+                                    [40, 180, 50, 70, 110, 180, 80, 80], self.build_anggota_row, self.fill_anggota_row,
+                                    self.font, "Tidak ada anggota yang ditemukan.")
+        return self.anggota_frame
 
     def search_anggota_ui(self, sort_only=False):
         search_term = "" if sort_only else self.anggota_search_entry.get().strip()
-        sort_option = self.anggota_sort_var.get()
+        self.show_anggota(search_term, self.anggota_sort_var.get())
+
+    def show_anggota(self, search_term, sort_option):
         data = self.db.search_anggota(search_term, sort_option)
         self.load_anggota_data(data)
+        self.last_query["anggota"] = (search_term, sort_option)
+        self.dirty["anggota"] = False
 
     def load_anggota_data(self, data):
-        for w in self.anggota_list_frame.winfo_children(): w.destroy()
-        if not data: return ctk.CTkLabel(self.anggota_list_frame, text="Tidak ada anggota yang ditemukan.").pack(pady=10)
-
-        col_widths = [40, 180, 50, 70, 110, 180, 80]
-        col_names = ["ID", "Nama", "JK", "Tahun", "Telp", "Alamat", "Aksi"]
-
-        hf = ctk.CTkFrame(self.anggota_list_frame, fg_color="gray25")
-        hf.pack(fill="x", padx=5, pady=(5,0))
-        
-        for i, c in enumerate(col_names): 
-            ctk.CTkLabel(hf, text=c, width=col_widths[i], text_color="white", font=ctk.CTkFont(weight="bold")).grid(row=0, column=i, padx=2, pady=5)
-
-        for i, row in enumerate(data):
-            row_color = ("gray90", "gray20") if i % 2 == 0 else ("gray85", "gray17")
-            rf = ctk.CTkFrame(self.anggota_list_frame, fg_color=row_color)
-            rf.pack(fill="x", padx=5, pady=2)
-            
-            vals = [
-                str(row[0]), 
-                self.limit_text(row[1], 22), 
-                row[3], 
-                str(row[2]), 
-                row[4], 
-                self.limit_text(row[5], 22)
-            ]
-
-            for j, val in enumerate(vals):
-                ctk.CTkLabel(rf, text=val, width=col_widths[j], anchor="center").grid(row=0, column=j, padx=2, pady=5)
-            
-            btn_frame = ctk.CTkFrame(rf, fg_color="transparent", width=col_widths[6], height=30)
-            btn_frame.grid(row=0, column=6, padx=2)
-            btn_frame.grid_propagate(False)
-            
-            ctk.CTkButton(btn_frame, text="Edit", width=col_widths[6]-10, height=25, 
-                          command=lambda id=row[0]: self.open_edit_anggota_window(id)).place(relx=0.5, rely=0.5, anchor="center")
+        self.anggota_pool.render(data)
+
+    def build_anggota_row(self, rf, col_widths):
+        labels = []
+        for j in range(6):
+            lbl = ctk.CTkLabel(rf, text="", width=col_widths[j], anchor="center")
+            lbl.grid(row=0, column=j, padx=2, pady=5)
+            labels.append(lbl)
+
+        btn_frame = ctk.CTkFrame(rf, fg_color="transparent", width=col_widths[6], height=30)
+        btn_frame.grid(row=0, column=6, padx=2)
+        btn_frame.grid_propagate(False)
+        edit_btn = ctk.CTkButton(btn_frame, text="Edit", width=col_widths[6]-10, height=25)
+        edit_btn.place(relx=0.5, rely=0.5, anchor="center")
+
+        det_frame = ctk.CTkFrame(rf, fg_color="transparent", width=col_widths[7], height=30)
+        det_frame.grid(row=0, column=7, padx=2)
+        det_frame.grid_propagate(False)
+        det_btn = ctk.CTkButton(det_frame, text="Detail", width=col_widths[7]-10, height=25, fg_color="gray40")
+        det_btn.place(relx=0.5, rely=0.5, anchor="center")
+
+        return {"labels": labels, "edit": edit_btn, "detail": det_btn}
+
+    def fill_anggota_row(self, row, ang):
+        vals = [
+            str(ang[0]), 
+            self.limit_text(ang[1], 22), 
+            ang[3], 
+            str(ang[2]), 
+            ang[4], 
+            self.limit_text(ang[5], 22)
+        ]
+        for lbl, val in zip(row["labels"], vals): lbl.configure(text=val)
+        row["edit"].configure(command=lambda id=ang[0]: self.open_edit_anggota_window(id))
+        row["detail"].configure(command=lambda id=ang[0]: self.open_detail_anggota_window(id))
 
     def open_add_anggota_window(self):
         self.win_add_ang = ctk.CTkToplevel(self)
@@ -555,7 +1437,6 @@ class App(ctk.CTk):
             try:
                 tahun_int = int(self.ea2.get())
                 if self.db.add_anggota(self.ea1.get(), tahun_int, self.ea3.get(), self.ea4.get(), self.ea5.get()):
-                    self.search_anggota_ui() 
                     self.close_win(self.win_add_ang)
                 else: messagebox.showerror("Error", "Gagal menyimpan.")
             except ValueError:
@@ -572,7 +1453,7 @@ class App(ctk.CTk):
         win.geometry("350x450")
         win.grab_set()
 
-        ctk.CTkLabel(win, text="Edit Data Anggota", font=ctk.CTkFont(weight="bold")).pack(pady=10)
+        ctk.CTkLabel(win, text="Edit Data Anggota", font=self.font(weight="bold")).pack(pady=10)
 
         def mk(lbl, val):
             ctk.CTkLabel(win, text=lbl).pack(anchor="w", padx=20, pady=(5,0))
@@ -589,7 +1470,6 @@ class App(ctk.CTk):
             try:
                 tahun_int = int(e_th.get())
                 if self.db.update_anggota(id_anggota, e_nm.get(), tahun_int, e_jk.get(), e_tl.get(), e_al.get()):
-                    self.search_anggota_ui() 
                     self.close_win(win)
                     messagebox.showinfo("Sukses", "Data anggota diperbarui.")
                 else: messagebox.showerror("Gagal", "Error update database.")
@@ -598,6 +1478,69 @@ class App(ctk.CTk):
 
         ctk.CTkButton(win, text="Simpan Perubahan", command=update).pack(pady=20)
 
+    def open_detail_anggota_window(self, id_anggota):
+        ang = self.db.get_anggota_by_id(id_anggota)
+        if not ang: return messagebox.showerror("Error", "Data anggota tidak ditemukan.")
+
+        win = ctk.CTkToplevel(self)
+        win.title(f"Detail Anggota ID: {id_anggota}")
+        win.geometry("560x520")
+        win.grab_set()
+
+        ctk.CTkLabel(win, text=ang[1], font=self.font(size=16, weight="bold")).pack(pady=(10, 0))
+        ctk.CTkLabel(win, text=f"Telp: {ang[4] or '-'}  |  Alamat: {self.limit_text(ang[5] or '-', 30)}").pack()
+
+        total, aktif, terlambat = self.db.get_ringkasan_anggota(id_anggota)
+        ctk.CTkLabel(win, text=f"Total Pinjam: {total}   Sedang Dipinjam: {aktif}/{BATAS_PINJAM}   Terlambat: {terlambat}",
+                     text_color="red" if terlambat else None, font=self.font(weight="bold")).pack(pady=(5, 10))
+
+        body = ctk.CTkScrollableFrame(win)
+        body.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        col_widths = [40, 200, 100, 100, 80]
+
+        def header(text, cols):
+            ctk.CTkLabel(body, text=text, font=self.font(weight="bold"), anchor="w").pack(fill="x", padx=5, pady=(10, 0))
+            hf = ctk.CTkFrame(body, fg_color="gray25")
+            hf.pack(fill="x", padx=5, pady=(5, 0))
+            for i, c in enumerate(cols):
+                ctk.CTkLabel(hf, text=c, width=col_widths[i], text_color="white", font=self.font(weight="bold")).grid(row=0, column=i, padx=2, pady=5)
+
+        def row(i, vals, status=None, status_col=None):
+            row_color = ("gray90", "gray20") if i % 2 == 0 else ("gray85", "gray17")
+            rf = ctk.CTkFrame(body, fg_color=row_color)
+            rf.pack(fill="x", padx=5, pady=2)
+            for j, v in enumerate(vals):
+                ctk.CTkLabel(rf, text=v, width=col_widths[j], anchor="center").grid(row=0, column=j, padx=2, pady=5)
+            if status:
+                ctk.CTkLabel(rf, text=status, width=col_widths[4], text_color=status_col, font=self.font(weight="bold")).grid(row=0, column=4, padx=2, pady=5)
+
+        header("Sedang Dipinjam", ["ID", "Buku", "Pinjam", "", "Status"])
+        aktif_rows = self.db.get_pinjaman_aktif_anggota(id_anggota)
+        if not aktif_rows: ctk.CTkLabel(body, text="Tidak ada pinjaman aktif.").pack(pady=5)
+        for i, r in enumerate(aktif_rows):
+            row(i, [str(r[0]), self.limit_text(r[1], 25), r[2], ""], "Terlambat" if r[3] else "Dipinjam", "red" if r[3] else "orange")
+
+        header("Riwayat Pengembalian", ["ID", "Buku", "Pinjam", "Kembali", "Catatan"])
+        paging = {"sebelum": None, "index": 0}
+        more_btn = ctk.CTkButton(body, text="Muat Lebih Banyak", height=25)
+
+        def load_more():
+            rows = self.db.get_riwayat_anggota(id_anggota, paging["sebelum"])
+            more_btn.pack_forget()
+            if not rows and paging["index"] == 0:
+                ctk.CTkLabel(body, text="Belum ada riwayat.").pack(pady=5)
+                return
+            for r in rows:
+                row(paging["index"], [str(r[0]), self.limit_text(r[1], 25), r[2], r[3], self.limit_text(r[4], 10) if r[4] else "-"])
+                paging["index"] += 1
+            if rows: paging["sebelum"] = (rows[-1][2], rows[-1][0])
+            if len(rows) == RIWAYAT_PAGE_SIZE: more_btn.pack(pady=5)
+
+        more_btn.configure(command=load_more)
+        load_more()
+        win.protocol("WM_DELETE_WINDOW", lambda: self.close_win(win))
+
     def create_history_frame(self):
         self.hist_frame = ctk.CTkFrame(self.main_content_frame, fg_color="transparent")
         self.hist_frame.grid(row=0, column=0, sticky="nsew")
@@ -614,43 +1557,38 @@ class App(ctk.CTk):
 
         self.hist_list = ctk.CTkScrollableFrame(self.hist_frame, label_text="Log Transaksi")
         self.hist_list.grid(row=1, column=0, padx=0, pady=0, sticky="nsew")
-        
-        self.load_history("Terbaru")
-
-    def load_history(self, filter_type):
-        for w in self.hist_list.winfo_children(): w.destroy()
-        data = self.db.get_history(filter_type)
-        if not data: return ctk.CTkLabel(self.hist_list, text="Kosong").pack(pady=10)
-
-        col_widths = [40, 150, 150, 100, 100, 120, 100]
-        col_names = ["ID", "Buku", "Peminjam", "Pinjam", "Kembali", "Catatan", "Status"]
 
-        hf = ctk.CTkFrame(self.hist_list, fg_color="gray25")
-        hf.pack(fill="x", padx=5, pady=(5,0))
-        
-        for i, c in enumerate(col_names): 
-            ctk.CTkLabel(hf, text=c, width=col_widths[i], text_color="white", font=ctk.CTkFont(weight="bold")).grid(row=0, column=i, padx=2, pady=5)
+        self.hist_pool = RowPool(self.hist_list, ["ID", "Buku", "Peminjam", "Pinjam", "Kembali", "Catatan", "Status"],
+                                 [40, 150, 150, 100, 100, 120, 100], self.build_history_row, self.fill_history_row,
+                                 self.font, "Kosong")
+        return self.hist_frame
 
-        for i, r in enumerate(data):
-            row_color = ("gray90", "gray20") if i % 2 == 0 else ("gray85", "gray17")
-            rf = ctk.CTkFrame(self.hist_list, fg_color=row_color)
-            rf.pack(fill="x", padx=5, pady=2)
-            
-            vals = [
-                str(r[0]), 
-                self.limit_text(r[1], 18), 
-                self.limit_text(r[2], 18), 
-                r[3], 
-                r[4] if r[4] else "-", 
-                self.limit_text(r[5], 15) if r[5] else "-"
-            ]
-            
-            for j, v in enumerate(vals): 
-                ctk.CTkLabel(rf, text=v, width=col_widths[j], anchor="center").grid(row=0, column=j, padx=2, pady=5)
-            
-            st_txt = "Kembali" if r[4] else "Dipinjam"
-            st_col = "green" if r[4] else "orange"
-            ctk.CTkLabel(rf, text=st_txt, width=col_widths[6], text_color=st_col, font=ctk.CTkFont(weight="bold")).grid(row=0, column=6, padx=2, pady=5)
+    def load_history(self, filter_type):
+        self.hist_pool.render(self.db.get_history(filter_type))
+        self.last_query["history"] = filter_type
+        self.dirty["history"] = False
+
+    def build_history_row(self, rf, col_widths):
+        labels = []
+        for j in range(7):
+            lbl = ctk.CTkLabel(rf, text="", width=col_widths[j], anchor="center",
+                               font=self.font(weight="bold") if j == 6 else None)
+            lbl.grid(row=0, column=j, padx=2, pady=5)
+            labels.append(lbl)
+        return {"labels": labels}
+
+    def fill_history_row(self, row, r):
+        vals = [
+            str(r[0]), 
+            self.limit_text(r[1], 18), 
+            self.limit_text(r[2], 18), 
+            r[3], 
+            r[4] if r[4] else "-", 
+            self.limit_text(r[5], 15) if r[5] else "-",
+            "Kembali" if r[4] else "Dipinjam"
+        ]
+        for lbl, v in zip(row["labels"], vals): lbl.configure(text=v)
+        row["labels"][6].configure(text_color="green" if r[4] else "orange")
 
     def open_pinjam_buku_window(self, buku_id):
         if not self.db.get_anggota_for_pinjam(): 
@@ -661,7 +1599,7 @@ class App(ctk.CTk):
         win.geometry("350x350") 
         win.grab_set()
 
-        ctk.CTkLabel(win, text="Cari Anggota (ID / Nama):", font=ctk.CTkFont(weight="bold")).pack(pady=(10, 5))
+        ctk.CTkLabel(win, text="Cari Anggota (ID / Nama):", font=self.font(weight="bold")).pack(pady=(10, 5))
         
         search_frame = ctk.CTkFrame(win)
         search_frame.pack(fill="x", padx=20)
@@ -676,7 +1614,7 @@ class App(ctk.CTk):
         
         selected_label_text = ctk.StringVar(value="-- Belum ada anggota terpilih --")
         ctk.CTkLabel(list_frame, textvariable=selected_label_text, 
-                     font=ctk.CTkFont(weight="bold"), 
+                     font=self.font(weight="bold"), 
                      wraplength=300).pack(pady=5)
                      
         def load_search_results(event=None):
@@ -687,7 +1625,7 @@ class App(ctk.CTk):
                  
             selected_anggota_id = None
             selected_label_text.set("-- Belum ada anggota terpilih --")
-            ctk.CTkLabel(list_frame, textvariable=selected_label_text, font=ctk.CTkFont(weight="bold"), wraplength=300).pack(pady=5)
+            ctk.CTkLabel(list_frame, textvariable=selected_label_text, font=self.font(weight="bold"), wraplength=300).pack(pady=5)
             
             if len(term) < 1:
                 ctk.CTkLabel(list_frame, text="Ketik ID atau Nama.").pack()
@@ -721,10 +1659,12 @@ class App(ctk.CTk):
             if selected_anggota_id is None:
                 return messagebox.showerror("Error", "Pilih anggota dari hasil pencarian terlebih dahulu.")
             
-            if self.db.pinjam_buku(buku_id, selected_anggota_id):
-                self.load_buku_data(self.sort_var.get())
+            res = self.db.pinjam_buku(buku_id, selected_anggota_id)
+            if res == "Sukses":
                 self.close_win(win)
                 messagebox.showinfo("OK", "Buku berhasil dipinjam.")
+            elif res == "Batas":
+                messagebox.showerror("Gagal", f"Anggota sudah meminjam {BATAS_PINJAM} buku. Kembalikan dulu sebelum meminjam lagi.")
             else:
                 messagebox.showerror("Gagal", "Error saat menyimpan peminjaman.")
 
@@ -740,7 +1680,7 @@ class App(ctk.CTk):
 
         if trx:
             nama, tgl, _ = trx
-            ctk.CTkLabel(win, text="Konfirmasi Pengembalian", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=10)
+            ctk.CTkLabel(win, text="Konfirmasi Pengembalian", font=self.font(size=16, weight="bold")).pack(pady=10)
             ctk.CTkLabel(win, text=f"Peminjam: {nama}").pack()
             ctk.CTkLabel(win, text=f"Sejak: {tgl}").pack()
             
@@ -751,7 +1691,6 @@ class App(ctk.CTk):
             def sub():
                 catatan = note_entry.get()
                 if self.db.kembalikan_buku(buku_id, catatan):
-                    self.load_buku_data(self.sort_var.get())
                     self.close_win(win)
                     messagebox.showinfo("Sukses", "Buku dikembalikan.")
                 else: messagebox.showerror("Gagal", "Error saat menyimpan pengembalian.")
@@ -764,9 +1703,7 @@ class App(ctk.CTk):
             
             def force_reset():
                 if messagebox.askyesno("Konfirmasi Reset", "Yakin ingin memaksa status buku menjadi Tersedia?"):
-                    self.db.cursor.execute("UPDATE buku SET status='Tersedia' WHERE id=?", (buku_id,))
-                    self.db.conn.commit()
-                    self.load_buku_data(self.sort_var.get())
+                    self.db.reset_status_buku(buku_id)
                     self.close_win(win)
                     messagebox.showinfo("Reset", "Status buku berhasil direset ke 'Tersedia'.")
                     
@@ -776,5 +1713,32 @@ class App(ctk.CTk):
 
 
 if __name__ == "__main__":
-    app = App()
+    parser = argparse.ArgumentParser(description="Sistem Manajemen Perpustakaan Mini")
+    parser.add_argument("--db", default="perpustakaan_final.db", help="Lokasi file database")
+    parser.add_argument("--pemeliharaan", action="store_true", help="Jalankan backup, vacuum, optimize & cek integritas tanpa GUI")
+    parser.add_argument("--backup", metavar="FILE", nargs="?", const="", help="Backup database saja (default ke folder backup/)")
+    parser.add_argument("--laporan", choices=[*JENIS_LAPORAN, "semua"], help="Buat laporan tanpa GUI (bisa dijadwalkan lewat cron/Task Scheduler)")
+    parser.add_argument("--periode", help="Periode laporan YYYY-MM atau YYYY (default: bulan lalu)")
+    parser.add_argument("--format", choices=["html", "pdf"], default="html", help="Format laporan")
+    args = parser.parse_args()
+
+    if args.laporan:
+        db = DatabaseManager(args.db)
+        for jenis in (JENIS_LAPORAN if args.laporan == "semua" else [args.laporan]):
+            hasil = db.buat_laporan(jenis, args.periode, args.format)
+            print(f"{JENIS_LAPORAN[jenis]}: {hasil['file']} ({hasil['baris']} baris, {hasil['halaman']} halaman, {hasil['durasi']:.2f} dtk)")
+        sys.exit(0)
+
+    if args.pemeliharaan or args.backup is not None:
+        db = DatabaseManager(args.db)
+        if args.backup is not None:
+            hasil = db.backup_database(args.backup or None)
+            print(f"Backup: {hasil['file']} ({hasil['ukuran'] / 1024:.1f} KB, {hasil['durasi']:.2f} dtk)")
+        if args.pemeliharaan:
+            laporan = db.jalankan_pemeliharaan(backup=args.backup is None)
+            print(db.ringkas_laporan(laporan))
+            if not laporan["integritas"]["ok"]: sys.exit(1)
+        sys.exit(0)
+
+    app = App(args.db)
     app.mainloop()
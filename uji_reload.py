@@ -0,0 +1,77 @@
+"""Ukur jumlah widget Tk & memori proses App setelah reload daftar berulang kali.
+
+    python uji_reload.py 10000 [--db perpustakaan_final.db]
+
+Database disalin dulu ke folder sementara, jadi data & backup asli tidak tersentuh
+(tanpa --db dipakai database kosong). Butuh display; di server tanpa layar jalankan
+lewat: xvfb-run python uji_reload.py 10000
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import tracemalloc
+
+from main import App
+
+
+def count_widgets(widget):
+    children = widget.winfo_children()
+    return len(children) + sum(count_widgets(w) for w in children)
+
+
+def rss_kb():
+    # Memori proses (termasuk objek Tcl/Tk di luar heap Python); /proc hanya ada di Linux
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("jumlah", type=int, nargs="?", default=10000)
+    parser.add_argument("--db", help="Database sumber yang disalin untuk pengujian")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="uji_reload_")
+    db_name = os.path.join(folder, "uji.db")
+    if args.db:
+        sumber, tujuan = sqlite3.connect(args.db), sqlite3.connect(db_name)
+        sumber.backup(tujuan)
+        sumber.close(); tujuan.close()
+
+    app = None
+    tracemalloc.start()
+    try:
+        app = App(db_name)
+        app.withdraw()
+        tabs = ["buku", "anggota", "history"]
+        reload = {
+            "buku": app.load_buku_data,
+            "anggota": app.search_anggota_ui,
+            "history": lambda: app.load_history(app.filt_var.get()),
+        }
+        for i in range(1, args.jumlah + 1):
+            name = tabs[i % len(tabs)]
+            app.select_frame(name)
+            reload[name]()
+            app.update_idletasks()
+            if i == 1 or i % max(1, args.jumlah // 10) == 0:
+                current, peak = tracemalloc.get_traced_memory()
+                rss = rss_kb()
+                print(f"reload {i:>6}: widget={count_widgets(app):>6}  "
+                      f"rss={'-' if rss is None else f'{rss} KB':>10}  "
+                      f"heap python={current / 1024:.0f} KB (puncak {peak / 1024:.0f} KB)")
+    finally:
+        tracemalloc.stop()
+        if app is not None:
+            app.db.conn.close()
+            app.destroy()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()